@@ -8,16 +8,20 @@ JavaScript code through websockets.
 
 import argparse
 import asyncio
+import ctypes
+import functools
+import http.client
 import json
 import logging
 from pathlib import Path
 import re
+import shlex
 import socket
 import subprocess
 import sys
 import time
-from typing import Any, Callable
-import urllib.error
+from typing import Any, Awaitable, Callable
+import urllib.parse
 import urllib.request
 import platform
 import tempfile
@@ -27,6 +31,17 @@ import psutil
 import websockets
 from websockets.exceptions import WebSocketException
 
+# CDP messages are all JSON, so use orjson for them when it is available
+try:
+    import orjson
+
+    def json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    json_loads = orjson.loads
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
 
 # Constants
 match platform.system():
@@ -37,12 +52,26 @@ match platform.system():
     case "Darwin":
         import plistlib
 
+        try:
+            import uvloop
+        except ImportError:
+            uvloop = None
+
         IS_WINDOWS = False
     case _:
         raise NotImplementedError("Unsupported platform")
 RIDI: str = "Ridibooks.exe" if IS_WINDOWS else "Ridibooks"
 INTERVAL: float = 0.2  # Seconds
-MAX_WAIT: int = 150  # Maximum wait iterations
+MAX_WAIT: float = 30.0  # Seconds
+PROCESS_SNAPSHOT_TTL: float = 0.25  # Seconds between full process list scans
+
+# Executable path at the start of a registry shell command, quoted or not
+_RIDI_CMD_RE = re.compile(r'^(?:"([^"]+)"|([^\s"]+))')
+
+# [macOS] Code signature mtime of RidiBooks as of the last entitlements check
+CODESIGN_STAMP: Path = (
+    Path.home() / "Library" / "Caches" / "ridi_injector" / "last_signed_mtime"
+)
 
 # Determine application path based on run environment (PyInstaller or direct)
 APP_PATH: Path = (
@@ -51,36 +80,49 @@ APP_PATH: Path = (
 
 logger = logging.getLogger("ridi_injector")
 
+# Last find_processes scan time and handles, keyed by process name
+_process_cache: dict[str, tuple[float, list[psutil.Process]]] = {}
+
 
 def terminate_process(name: str) -> bool:
     """Terminate a running process by name.
 
+    Handles cached by find_processes are used when any of them are still
+    running, otherwise the process list is scanned.
+
     Args:
         name: The name of the process to terminate (e.g., "Ridibooks.exe").
 
     Returns:
         bool: True if termination was successful, False otherwise.
     """
-    terminated = False
-    try:
-        for proc in psutil.process_iter(["name"]):
-            if proc.info["name"] != name:
-                continue
+    terminated = []
+    for proc in running_cached_processes(name) or find_processes(name):
+        try:
             proc.terminate()
-            try:
-                proc.wait(timeout=0.5)
-            except psutil.TimeoutExpired:
-                proc.kill()
-
-            terminated = True
-            logger.info("Successfully terminated process %s (PID: %s)", name, proc.pid)
+            terminated.append(proc)
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.AccessDenied as e:
+            logger.error("Failed to terminate process %s: %s", name, e)
+
+    # Wait for all processes at once, then kill the ones still running
+    _, alive = psutil.wait_procs(terminated, timeout=0.5)
+    for proc in alive:
+        try:
+            proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.AccessDenied as e:
+            logger.error("Failed to kill process %s: %s", name, e)
 
-        if not terminated:
-            logger.info("No process with name %s was found", name)
+    for proc in terminated:
+        logger.info("Successfully terminated process %s (PID: %s)", name, proc.pid)
+    if not terminated:
+        logger.info("No process with name %s was found", name)
 
-    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
-        logger.error("Failed to terminate process %s: %s", name, e)
-    return terminated
+    invalidate_process_cache(name)
+    return bool(terminated)
 
 
 def read_file(relative_path: str | Path) -> str | bool:
@@ -112,9 +154,28 @@ def read_file(relative_path: str | Path) -> str | bool:
         return False
 
 
-JSZIP_JS = read_file("scripts/jszip.js")
-INJECT_JS = read_file("scripts/inject.js")
-REMOTE_DEBUGGING_JS = read_file("scripts/remote-debugging.js")
+@functools.cache
+def get_viewer_payload() -> str | bool:
+    """Get JSZip and the main injection script, injected into the viewer together.
+
+    Returns:
+        str: Both scripts, read on the first call.
+        bool: False if either script could not be read.
+    """
+    jszip_js = read_file("scripts/jszip.js")
+    inject_js = read_file("scripts/inject.js")
+    return f"{jszip_js}\n;\n{inject_js}" if jszip_js and inject_js else False
+
+
+@functools.cache
+def get_remote_debugging_js() -> str | bool:
+    """Get the script that enables remote debugging in RidiBooks.
+
+    Returns:
+        str: The script, read on the first call.
+        bool: False if the script could not be read.
+    """
+    return read_file("scripts/remote-debugging.js")
 
 
 def setup_logger(
@@ -169,50 +230,125 @@ def get_free_port() -> int:
         socket.error: If socket operations fail.
     """
     try:
-        with socket.socket() as s:
-            s.bind(("", 0))
+        # RidiBooks only listens on loopback, so only check the port there
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("127.0.0.1", 0))
             return s.getsockname()[1]
     except socket.error as e:
         logger.error("Failed to get free port: %s", e)
         raise
 
 
+def invalidate_process_cache(name: str) -> None:
+    """Make the next find_processes call scan the process list again.
+
+    Call this after starting or terminating processes, when the last scan is
+    known to be outdated.
+
+    Args:
+        name: The name of the processes (e.g., "Ridibooks.exe").
+    """
+    _process_cache.pop(name, None)
+
+
+def cache_process(name: str, pid: int) -> None:
+    """Replace the cached processes with one whose pid is already known.
+
+    This saves a full process list scan for processes started by us.
+
+    Args:
+        name: The name of the process (e.g., "Ridibooks.exe").
+        pid: The process id.
+    """
+    try:
+        _process_cache[name] = (time.monotonic(), [psutil.Process(pid)])
+    except psutil.NoSuchProcess:
+        invalidate_process_cache(name)
+
+
+def running_cached_processes(name: str) -> list[psutil.Process]:
+    """Get the still running processes from the last find_processes scan.
+
+    Handles of exited processes are dropped from the cache, so they are not
+    checked again.
+
+    Args:
+        name: The name of the processes (e.g., "Ridibooks.exe").
+
+    Returns:
+        list[psutil.Process]: Handles of the cached processes that are running.
+    """
+    scanned_at, procs = _process_cache.get(name, (0.0, []))
+    running = [proc for proc in procs if proc.is_running()]
+    if len(running) != len(procs):
+        _process_cache[name] = (scanned_at, running)
+    return running
+
+
+def find_processes(name: str) -> list[psutil.Process]:
+    """Find all processes with the given name and cache their handles.
+
+    The process list is scanned at most once per PROCESS_SNAPSHOT_TTL; calls
+    in between reuse the handles from the last scan.
+
+    Args:
+        name: The name of the processes to find (e.g., "Ridibooks.exe").
+
+    Returns:
+        list[psutil.Process]: Handles of the matching processes.
+    """
+    scanned_at, _ = _process_cache.get(name, (0.0, []))
+    if time.monotonic() - scanned_at < PROCESS_SNAPSHOT_TTL:
+        return running_cached_processes(name)
+
+    try:
+        procs = [
+            proc
+            for proc in psutil.process_iter(["name"])
+            if proc.info.get("name") == name
+        ]
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
+        logger.error("Failed to find processes %s: %s", name, e)
+        procs = []
+    _process_cache[name] = (time.monotonic(), procs)
+    return procs
+
+
 def is_process_running(name: str) -> bool:
     """Check if a process with the given name is running.
 
+    Cached handles are checked first, so the full process list is only walked
+    again once every previously found process has exited.
+
     Args:
         name: The name of the process to check (e.g., "Ridibooks.exe").
 
     Returns:
         bool: True if the process is running, False otherwise.
     """
-    try:
-        return any(
-            proc.info.get("name") == name for proc in psutil.process_iter(["name"])
-        )
-    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
-        logger.error("Failed to check if process %s is running: %s", name, e)
-        return False
+    return bool(running_cached_processes(name) or find_processes(name))
 
 
+@functools.lru_cache(maxsize=1)
 def get_ridi_path() -> str | None:
     """[platform-specific-windows] Get the installation path of RidiBooks from Windows registry.
 
+    On macOS, the executable inside the application bundle is returned.
+
     Returns:
         str | None: Path to RidiBooks executable or None if not found.
     """
     if not IS_WINDOWS:
-        return RIDI
+        return f"/Applications/{RIDI}.app/Contents/MacOS/{RIDI}"
     try:
-        key = winreg.OpenKey(
+        with winreg.OpenKey(
             winreg.HKEY_CLASSES_ROOT, "ridi\\shell\\open\\command", 0, winreg.KEY_READ
-        )
-        value, _ = winreg.QueryValueEx(key, "")
-        winreg.CloseKey(key)
+        ) as key:
+            value, _ = winreg.QueryValueEx(key, "")
 
-        match = re.match(r'^(?:"([^"]+)"|([^\s"]+))', value.strip())
+        match = _RIDI_CMD_RE.match(value.strip())
         return match and (match.group(1) or match.group(2))
-    except (OSError, re.error) as e:
+    except OSError as e:
         logger.error("Failed to get RidiBooks path from registry: %s", e)
         return None
 
@@ -226,45 +362,78 @@ def sudo_run(command: str) -> None:
     """Run a command with sudo privileges.
 
     Args:
-        command: Command to run with sudo.
+        command: Shell command to run with sudo.
 
     Raises:
         CalledProcessError: If the command fails or user cancels the procedure.
     """
-    command = command.replace('"', r"\"")
     if IS_WINDOWS:
         logger.error("[macOS setup] This error should not ever happen")
         raise NotImplementedError("Sudo run is not implemented for Windows")
 
     logger.debug("[macOS setup] Running command with sudo: %s", command)
+    # Pass the command as a script argument, so it needs no AppleScript quoting
     result = subprocess.run(
         [
             "osascript",
             "-e",
-            f'do shell script "{command}" with administrator privileges',
+            "on run argv",
+            "-e",
+            "do shell script (item 1 of argv) with administrator privileges",
+            "-e",
+            "end run",
+            command,
         ],
         capture_output=True,
         text=True,
         check=True,
     )
-    return result.returncode, result.stdout.rstrip("\0").strip(), result.stderr.rstrip("\0").strip()
+    return (
+        result.returncode,
+        result.stdout.rstrip("\0").strip(),
+        result.stderr.rstrip("\0").strip(),
+    )
+
+
+def get_codesign_mtime() -> str | None:
+    """[platform-specific-macos] Get when the RidiBooks code signature last changed.
+
+    Returns:
+        str | None: Modification time in nanoseconds or None if not found.
+    """
+    try:
+        return str(
+            Path(f"/Applications/{RIDI}.app/Contents/_CodeSignature/CodeResources")
+            .stat()
+            .st_mtime_ns
+        )
+    except OSError:
+        return None
 
 
 def mac_setup() -> None:
+    # Skip the codesign probe if RidiBooks is unchanged since it was last checked
+    codesign_mtime = get_codesign_mtime()
+    try:
+        if codesign_mtime and CODESIGN_STAMP.read_text() == codesign_mtime:
+            logger.debug("[macOS setup] Codesign unchanged, skipping setup")
+            return
+    except OSError:
+        pass
+
     logger.debug("[macOS setup] Trying to kill Ridibooks process")
     terminate_process(RIDI)
     time.sleep(1)
     logger.debug("[macOS setup] Checking if codesign is needed")
+    app_path = f"/Applications/{RIDI}.app"
     proc = subprocess.run(
-        f"codesign -d --entitlements - /Applications/{RIDI}.app --xml",
-        shell=True,
+        ["codesign", "-d", "--entitlements", "-", "--xml", app_path],
         stdout=subprocess.PIPE,
         stderr=subprocess.DEVNULL,
-        text=True,
         check=False,
     )
     logger.debug("[macOS setup] Codesign entitlements fetched")
-    plist = plistlib.loads(proc.stdout.rstrip("\0").strip())
+    plist = plistlib.loads(proc.stdout.rstrip(b"\0").strip())
     if plist.get("com.apple.security.get-task-allow") is not True:
         logger.debug("[macOS setup] Important entitlements not found, adding")
         plist["com.apple.security.get-task-allow"] = True
@@ -274,11 +443,22 @@ def mac_setup() -> None:
             logger.debug("[macOS setup] Signing with codesign")
             try:
                 sudo_run(
-                    "codesign --force --deep --options runtime "
-                    f'--entitlements "{temp.name}" '
-                    "--sign - "
-                    f'"/Applications/{RIDI}.app";'
-                    f"xattr -rd com.apple.quarantine /Applications/{RIDI}.app"
+                    shlex.join(
+                        [
+                            "codesign",
+                            "--force",
+                            "--deep",
+                            "--options",
+                            "runtime",
+                            "--entitlements",
+                            temp.name,
+                            "--sign",
+                            "-",
+                            app_path,
+                        ]
+                    )
+                    + ";"
+                    + shlex.join(["xattr", "-rd", "com.apple.quarantine", app_path])
                 )
             except subprocess.CalledProcessError as e:
                 logger.debug("[macOS setup] Error message: %s", e.stderr)
@@ -286,37 +466,356 @@ def mac_setup() -> None:
             logger.debug("[macOS setup] Codesign completed")
             logger.debug("[macOS setup] Removing old keychain entry")
             subprocess.run(
-                "security delete-generic-password -s com.ridi.books",
-                shell=True,
+                ["security", "delete-generic-password", "-s", "com.ridi.books"],
                 check=False,
             )
             logger.debug("[macOS setup] Old keychain entry removed")
 
+    try:
+        CODESIGN_STAMP.parent.mkdir(parents=True, exist_ok=True)
+        CODESIGN_STAMP.write_text(get_codesign_mtime() or "")
+    except OSError as e:
+        logger.debug("[macOS setup] Failed to save codesign mtime: %s", e)
+
+
+class _IoCounters(ctypes.Structure):
+    _fields_ = [
+        ("ReadOperationCount", ctypes.c_uint64),
+        ("WriteOperationCount", ctypes.c_uint64),
+        ("OtherOperationCount", ctypes.c_uint64),
+        ("ReadTransferCount", ctypes.c_uint64),
+        ("WriteTransferCount", ctypes.c_uint64),
+        ("OtherTransferCount", ctypes.c_uint64),
+    ]
+
+
+class _JobObjectBasicLimitInformation(ctypes.Structure):
+    _fields_ = [
+        ("PerProcessUserTimeLimit", ctypes.c_int64),
+        ("PerJobUserTimeLimit", ctypes.c_int64),
+        ("LimitFlags", ctypes.c_uint32),
+        ("MinimumWorkingSetSize", ctypes.c_size_t),
+        ("MaximumWorkingSetSize", ctypes.c_size_t),
+        ("ActiveProcessLimit", ctypes.c_uint32),
+        ("Affinity", ctypes.c_size_t),
+        ("PriorityClass", ctypes.c_uint32),
+        ("SchedulingClass", ctypes.c_uint32),
+    ]
+
+
+class _JobObjectExtendedLimitInformation(ctypes.Structure):
+    _fields_ = [
+        ("BasicLimitInformation", _JobObjectBasicLimitInformation),
+        ("IoInfo", _IoCounters),
+        ("ProcessMemoryLimit", ctypes.c_size_t),
+        ("JobMemoryLimit", ctypes.c_size_t),
+        ("PeakProcessMemoryUsed", ctypes.c_size_t),
+        ("PeakJobMemoryUsed", ctypes.c_size_t),
+    ]
+
+
+class JobObject:
+    """[platform-specific-windows] Job object that kills its processes when closed.
+
+    Processes started by a process in the job join it as well, so closing the
+    job terminates a whole process tree at once.
+    """
+
+    JOB_OBJECT_LIMIT_KILL_ON_JOB_CLOSE = 0x2000
+    JOB_OBJECT_EXTENDED_LIMIT_INFORMATION = 9
+    PROCESS_SET_QUOTA = 0x0100
+    PROCESS_TERMINATE = 0x0001
+
+    def __init__(self):
+        """Create the job object.
+
+        Raises:
+            OSError: If the job object cannot be created.
+        """
+        self.kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self.kernel32.CreateJobObjectW.restype = ctypes.c_void_p
+        self.kernel32.CreateJobObjectW.argtypes = (ctypes.c_void_p, ctypes.c_wchar_p)
+        self.kernel32.SetInformationJobObject.argtypes = (
+            ctypes.c_void_p,
+            ctypes.c_int,
+            ctypes.c_void_p,
+            ctypes.c_uint32,
+        )
+        self.kernel32.OpenProcess.restype = ctypes.c_void_p
+        self.kernel32.OpenProcess.argtypes = (
+            ctypes.c_uint32,
+            ctypes.c_int,
+            ctypes.c_uint32,
+        )
+        self.kernel32.AssignProcessToJobObject.argtypes = (
+            ctypes.c_void_p,
+            ctypes.c_void_p,
+        )
+        self.kernel32.CloseHandle.argtypes = (ctypes.c_void_p,)
+
+        self.handle = self.kernel32.CreateJobObjectW(None, None)
+        if not self.handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+
+        info = _JobObjectExtendedLimitInformation()
+        info.BasicLimitInformation.LimitFlags = self.JOB_OBJECT_LIMIT_KILL_ON_JOB_CLOSE
+        if not self.kernel32.SetInformationJobObject(
+            self.handle,
+            self.JOB_OBJECT_EXTENDED_LIMIT_INFORMATION,
+            ctypes.byref(info),
+            ctypes.sizeof(info),
+        ):
+            error = ctypes.WinError(ctypes.get_last_error())
+            self.close()
+            raise error
+
+    def assign(self, pid: int) -> None:
+        """Add a process to the job.
+
+        Args:
+            pid: ID of the process to add.
+
+        Raises:
+            OSError: If the process cannot be opened or added.
+        """
+        process = self.kernel32.OpenProcess(
+            self.PROCESS_SET_QUOTA | self.PROCESS_TERMINATE, False, pid
+        )
+        if not process:
+            raise ctypes.WinError(ctypes.get_last_error())
+        try:
+            if not self.kernel32.AssignProcessToJobObject(self.handle, process):
+                raise ctypes.WinError(ctypes.get_last_error())
+        finally:
+            self.kernel32.CloseHandle(process)
+
+    def close(self) -> None:
+        """Close the job, terminating every process still in it."""
+        if self.handle:
+            self.kernel32.CloseHandle(self.handle)
+            self.handle = None
+
 
 #
 # Debugger communication
 #
 
 
-def get_debuggers(debug_url: str) -> list[dict[str, Any]] | None:
-    """Get list of available Chrome DevTools debuggers.
+def get_browser_debugger(debug_url: str) -> str | None:
+    """Get the browser-wide Chrome DevTools WebSocket URL.
 
     Args:
         debug_url: URL for Chrome DevTools debugging.
 
     Returns:
-        list[dict[str, Any]] | None: List of debugger information or None if failed.
+        str | None: WebSocket URL of the browser target or None if failed.
     """
     try:
-        with urllib.request.urlopen(debug_url, timeout=0.5) as response:
-            return json.loads(response.read().decode("utf-8"))
-    except (urllib.error.URLError, json.JSONDecodeError, TimeoutError) as e:
-        logger.debug("Failed to get debuggers: %s", e)
+        with urllib.request.urlopen(f"{debug_url}/version", timeout=0.5) as response:
+            return json_loads(response.read())["webSocketDebuggerUrl"]
+    except (OSError, http.client.HTTPException, json.JSONDecodeError, KeyError) as e:
+        # urlopen only wraps errors while sending the request in URLError (an
+        # OSError), a dropped or malformed response raises them unwrapped
+        logger.debug("Failed to get browser debugger: %s", e)
         return None
 
 
+def prepare_command(method: str, params: dict[str, Any] | None = None) -> bytes:
+    """Serialize a CDP command so it can be sent any number of times.
+
+    Args:
+        method: CDP method name.
+        params: CDP method parameters.
+
+    Returns:
+        bytes: The JSON command without its leading brace, ready for an id prefix.
+    """
+    command = json_dumps({"method": method, "params": params or {}})
+    return command[1:].encode("utf-8")
+
+
+@functools.lru_cache(maxsize=32)
+def prepare_evaluate(script: str) -> bytes:
+    """Serialize a Runtime.evaluate command, reused for repeated scripts.
+
+    Args:
+        script: JavaScript code to execute.
+
+    Returns:
+        bytes: The command, serialized by prepare_command.
+    """
+    return prepare_command(
+        "Runtime.evaluate",
+        {"expression": script, "returnByValue": True, "awaitPromise": True},
+    )
+
+
+class CDPSession:
+    """Persistent Chrome DevTools Protocol connection to a single debugger."""
+
+    def __init__(self, ws_url: str):
+        """Initialize the session.
+
+        Args:
+            ws_url: WebSocket URL for the debugger.
+        """
+        self.ws_url = ws_url
+        self.ws = None
+        self.next_id = 1
+        self.pending: dict[int, asyncio.Future] = {}  # message id -> response
+        self.listeners: dict[str, list[Callable[[dict[str, Any]], None]]] = {}
+        self.reader_task = None
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def closed(self) -> bool:
+        """Whether the connection has been opened and closed since."""
+        return self.reader_task is not None and self.reader_task.done()
+
+    async def connect(self) -> None:
+        """Open the WebSocket connection if it is not open yet."""
+        async with self._connect_lock:
+            if self.ws is None:
+                # Debuggers are on loopback, where compression only costs CPU
+                self.ws = await websockets.connect(self.ws_url, compression=None)
+                self.reader_task = asyncio.create_task(self._reader())
+
+    async def close(self) -> None:
+        """Close the WebSocket connection."""
+        if self.reader_task:
+            self.reader_task.cancel()
+        if self.ws:
+            await self.ws.close()
+
+    def add_listener(
+        self, method: str, callback: Callable[[dict[str, Any]], None]
+    ) -> None:
+        """Call a function with the params of every matching CDP event.
+
+        Args:
+            method: CDP event name (e.g., "Page.frameAttached").
+            callback: Function called with the event params.
+        """
+        self.listeners.setdefault(method, []).append(callback)
+
+    def remove_listener(
+        self, method: str, callback: Callable[[dict[str, Any]], None]
+    ) -> None:
+        """Stop calling a function added with add_listener.
+
+        Args:
+            method: CDP event name.
+            callback: Function to remove.
+        """
+        if callback in self.listeners.get(method, []):
+            self.listeners[method].remove(callback)
+
+    async def _reader(self) -> None:
+        """Resolve pending requests by message id and dispatch CDP events."""
+        try:
+            async for message in self.ws:
+                response = json_loads(message)
+                if "id" not in response:
+                    for callback in list(self.listeners.get(response["method"], [])):
+                        callback(response.get("params", {}))
+                    continue
+                future = self.pending.pop(response["id"], None)
+                if future and not future.done():
+                    future.set_result(response)
+        except (WebSocketException, json.JSONDecodeError, ConnectionError) as e:
+            logger.debug("[debugger] Connection to %s lost: %s", self.ws_url, e)
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("CDP session closed"))
+            self.pending.clear()
+
+    async def send(self, method: str, params: dict[str, Any] | None = None) -> dict:
+        """Send a CDP command and wait for its response.
+
+        Args:
+            method: CDP method name.
+            params: CDP method parameters.
+
+        Returns:
+            dict: The CDP response message.
+
+        Raises:
+            ConnectionError: If the session is closed before the response arrives.
+        """
+        return await self.send_prepared(prepare_command(method, params))
+
+    async def send_prepared(self, command: bytes) -> dict:
+        """Send a command serialized by prepare_command and wait for its response.
+
+        Args:
+            command: Serialized CDP command, without its message id.
+
+        Returns:
+            dict: The CDP response message.
+
+        Raises:
+            ConnectionError: If the session is closed before the response arrives.
+        """
+        if self.closed:
+            raise ConnectionError("CDP session closed")
+        message_id = self.next_id
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[message_id] = future
+        try:
+            await self.ws.send(b'{"id":%d,%s' % (message_id, command), text=True)
+        except WebSocketException:
+            self.pending.pop(message_id, None)
+            raise
+        return await future
+
+    async def evaluate(self, script: str) -> Any:
+        """Evaluate JavaScript code in the debugger.
+
+        Args:
+            script: JavaScript code to execute.
+
+        Returns:
+            Any: Result of the JavaScript execution.
+        """
+        response = await self.send_prepared(prepare_evaluate(script))
+        return response.get("result", {}).get("result", {}).get("value")
+
+
+# Open CDP sessions, keyed by debugger WebSocket URL
+_sessions: dict[str, CDPSession] = {}
+
+
+async def get_session(ws_url: str) -> CDPSession:
+    """Get the open CDP session for a debugger, connecting if needed.
+
+    Args:
+        ws_url: WebSocket URL for the debugger.
+
+    Returns:
+        CDPSession: The connected session.
+    """
+    session = _sessions.get(ws_url)
+    if session is None or session.closed:
+        session = _sessions[ws_url] = CDPSession(ws_url)
+    await session.connect()
+    return session
+
+
+async def close_session(ws_url: str) -> None:
+    """Close the CDP session for a debugger, if any.
+
+    Args:
+        ws_url: WebSocket URL for the debugger.
+    """
+    session = _sessions.pop(ws_url, None)
+    if session:
+        await session.close()
+
+
 async def execute_js(ws_url: str, script: str) -> Any:
-    """Execute JavaScript code through WebSocket connection.
+    """Execute JavaScript code through the debugger's CDP session.
 
     Args:
         ws_url: WebSocket URL for the debugger.
@@ -326,68 +825,111 @@ async def execute_js(ws_url: str, script: str) -> Any:
         Any: Result of the JavaScript execution or None if failed.
     """
     try:
-        async with websockets.connect(ws_url) as ws:
-            command = {
-                "id": 1,
-                "method": "Runtime.evaluate",
-                "params": {
-                    "expression": script,
-                    "returnByValue": True,
-                    "awaitPromise": True,
-                },
-            }
-            await ws.send(json.dumps(command))
-            response = json.loads(await ws.recv())
-            return response.get("result", {}).get("result", {}).get("value")
+        session = await get_session(ws_url)
+        return await session.evaluate(script)
     except (WebSocketException, json.JSONDecodeError, ConnectionError) as e:
         logger.error("Failed to execute JavaScript: %s", e)
         return None
 
 
+def backoff_delay(attempt: int) -> float:
+    """Get the delay before the next attempt of an exponential backoff.
+
+    Args:
+        attempt: Number of attempts made so far.
+
+    Returns:
+        float: Delay in seconds, from a few milliseconds up to INTERVAL.
+    """
+    return min(INTERVAL, 0.005 * 1.5**attempt)
+
+
 async def wait_for(
-    condition_func: Callable[[], bool | Any], max_attempts: int = MAX_WAIT
+    condition_func: Callable[[], bool | Any], timeout: float = MAX_WAIT
 ) -> bool:
     """Wait for a condition to become true.
 
+    The condition is checked with an exponential backoff (see backoff_delay).
+
     Args:
         condition_func: Function that returns a truthy value when condition is met.
-        max_attempts: Maximum number of attempts before giving up.
+        timeout: Maximum time to wait in seconds.
 
     Returns:
         bool: True if condition was met, False if timed out.
     """
-    for _ in range(max_attempts):
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
         try:
             result = condition_func()
             if result:
                 return True
         except Exception as e:
             # This broad exception is intentional as condition_func could fail in many ways
-            # and we want to continue trying until max_attempts is reached
+            # and we want to continue trying until the timeout is reached
             logger.debug("Exception in condition function: %s", e)
-        await asyncio.sleep(INTERVAL)
-    logger.warning("Condition not met after %d attempts", max_attempts)
+        if time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(backoff_delay(attempt))
+        attempt += 1
+    logger.warning("Condition not met after %.1f seconds", timeout)
     return False
 
 
-class DebuggerMonitor:
-    """Monitor for Chrome DevTools debugger output."""
+def format_remote_object(remote_object: dict[str, Any]) -> str:
+    """Format a CDP RemoteObject the way the console would show it.
+
+    Args:
+        remote_object: CDP RemoteObject, e.g. an argument of a console call.
+
+    Returns:
+        str: The primitive value, or the object's description.
+    """
+    if "value" in remote_object:
+        value = remote_object["value"]
+        # JSON renders null, true and false as JavaScript does, unlike str()
+        return value if isinstance(value, str) else json_dumps(value)
+    if "unserializableValue" in remote_object:
+        return remote_object["unserializableValue"]
+    return remote_object.get("description", remote_object.get("type", ""))
+
 
-    def __init__(self, debug_url: str, polling_interval: float = 0.1):
+class DebuggerMonitor:
+    """Monitor for Chrome DevTools debuggers and their output."""
+
+    def __init__(
+        self,
+        debug_url: str,
+        exited: asyncio.Future,
+        on_new_debugger: Callable[[str, str], Awaitable[Any]] | None = None,
+        attach_when: Callable[[str], bool] | None = None,
+        max_concurrent_attach: int = 4,
+    ):
         """Initialize the debugger monitor.
 
         Args:
             debug_url: URL for Chrome DevTools debugging.
-            polling_interval: How often to poll for debugger output in seconds.
+            exited: Future resolved when the RidiBooks process exits.
+            on_new_debugger: Coroutine called with the id and WebSocket URL of
+                a page debugger whenever its URL starts matching attach_when.
+            attach_when: Function checking a page URL, matching every URL if None.
+            max_concurrent_attach: How many on_new_debugger calls may run at once.
         """
         self.debug_url = debug_url
-        self.polling_interval = polling_interval
+        self.debug_host = urllib.parse.urlsplit(debug_url).netloc
+        self.exited = exited
+        self.on_new_debugger = on_new_debugger
+        self.attach_when = attach_when or (lambda url: True)
         self.active_debuggers: dict[str, str] = {}  # id -> websocket_url
+        self.attach_matched: dict[str, bool] = {}  # id -> URL matched attach_when
         self.monitoring_task = None
+        self.tasks: set[asyncio.Task] = set()
+        self._attach_limit = asyncio.Semaphore(max_concurrent_attach)
 
     async def start_monitoring(self):
         """Start the monitoring task."""
-        self.monitoring_task = asyncio.create_task(self._monitor_loop())
+        self.monitoring_task = asyncio.create_task(self._watch_targets())
         logger.info("[debugger] Started debugger monitoring")
 
     async def stop_monitoring(self):
@@ -398,198 +940,236 @@ class DebuggerMonitor:
                 await self.monitoring_task
             except asyncio.CancelledError:
                 pass
+            for task in self.tasks:
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            for ws_url in self.active_debuggers.values():
+                await close_session(ws_url)
             logger.info("[debugger] Stopped debugger monitoring")
 
-    async def _monitor_loop(self):
-        """Main monitoring loop that periodically checks debugger output."""
-        while is_process_running(RIDI):
-            try:
-                # Get current debuggers
-                debuggers = get_debuggers(self.debug_url)
-                if debuggers:
-                    # Update active debuggers list
-                    current_ids = {d["id"] for d in debuggers}
-                    new_debuggers = [
-                        d for d in debuggers if d["id"] not in self.active_debuggers
-                    ]
-
-                    # Add new debuggers to monitoring
-                    for debugger in new_debuggers:
-                        debugger_id = debugger["id"]
-                        ws_url = debugger["webSocketDebuggerUrl"]
-                        self.active_debuggers[debugger_id] = ws_url
-                        logger.info(
-                            "[debugger-%s] Started monitoring debugger", debugger_id
+    async def _watch_targets(self):
+        """Track debuggers through Target domain events until RidiBooks exits.
+
+        Enabling target discovery also reports every target that already
+        exists, so no separate listing of the current debuggers is needed, and
+        the connection can simply be reopened if it drops.
+        """
+        # The endpoint only comes up once RidiBooks has finished starting
+        attempt = 0
+        while not self.exited.done():
+            if browser_ws_url := await asyncio.to_thread(
+                get_browser_debugger, self.debug_url
+            ):
+                try:
+                    async with websockets.connect(
+                        browser_ws_url, compression=None
+                    ) as ws:
+                        attempt = 0
+                        command = {
+                            "id": 1,
+                            "method": "Target.setDiscoverTargets",
+                            "params": {"discover": True},
+                        }
+                        await ws.send(json_dumps(command))
+                        async for message in ws:
+                            await self._handle_target_event(json_loads(message))
+                    if not self.exited.done():
+                        logger.error(
+                            "[debugger] Browser debugger closed the connection, "
+                            "reconnecting"
+                        )
+                except (WebSocketException, json.JSONDecodeError, OSError) as e:
+                    if not self.exited.done():
+                        logger.error(
+                            "[debugger] Lost connection to browser debugger, "
+                            "reconnecting: %s",
+                            e,
                         )
+            await asyncio.wait((self.exited,), timeout=backoff_delay(attempt))
+            attempt += 1
 
-                    # Remove debuggers that are no longer active
-                    closed_debuggers = [
-                        debugger_id
-                        for debugger_id in list(self.active_debuggers.keys())
-                        if debugger_id not in current_ids
-                    ]
-                    for debugger_id in closed_debuggers:
-                        logger.info("[debugger-%s] Debugger closed", debugger_id)
-                        del self.active_debuggers[debugger_id]
+    async def _handle_target_event(self, event: dict[str, Any]):
+        """Dispatch a message from the browser debugger.
 
-                    # Poll each active debugger for output
-                    for debugger_id, ws_url in self.active_debuggers.items():
-                        await self._poll_debugger_output(debugger_id, ws_url)
+        Args:
+            event: CDP message received from the browser debugger.
+        """
+        match event.get("method"):
+            case "Target.targetCreated" | "Target.targetInfoChanged":
+                self._update_debugger(event["params"]["targetInfo"])
+            case "Target.targetDestroyed":
+                await self._remove_debugger(event["params"]["targetId"])
 
-            except Exception as e:
-                logger.error("[debugger] Error in debugger monitor: %s", e)
+    def _update_debugger(self, target_info: dict[str, Any]):
+        """Start monitoring a page target, and attach when its URL matches.
 
-            await asyncio.sleep(self.polling_interval)
+        Targets are created before their first navigation commits, so the URL
+        is checked again on every Target.targetInfoChanged.
 
-        logger.info("[debugger] RidiBooks process exited, stopping monitor")
+        Args:
+            target_info: CDP TargetInfo of the created or changed target.
+        """
+        # Only pages can be viewers, workers have no DOM to inject into
+        if target_info.get("type") != "page":
+            return
+        debugger_id = target_info["targetId"]
+        ws_url = self.active_debuggers.get(debugger_id)
+        if ws_url is None:
+            ws_url = f"ws://{self.debug_host}/devtools/page/{debugger_id}"
+            self.active_debuggers[debugger_id] = ws_url
+            self._start_task(self._watch_console(debugger_id, ws_url))
+
+        # Attach in the background so targets created together overlap their waits
+        matched = self.attach_when(target_info.get("url", ""))
+        if matched and not self.attach_matched.get(debugger_id):
+            self._start_task(self._attach(debugger_id, ws_url))
+        self.attach_matched[debugger_id] = matched
+
+    def _start_task(self, coro: Awaitable[Any]):
+        """Run a coroutine in the background until monitoring stops.
+
+        Args:
+            coro: Coroutine to run.
+        """
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
 
-    async def _poll_debugger_output(self, debugger_id: str, ws_url: str):
-        """Poll a specific debugger for console output.
+    async def _attach(self, debugger_id: str, ws_url: str):
+        """Call on_new_debugger, limited to max_concurrent_attach at a time.
 
         Args:
             debugger_id: ID of the debugger.
             ws_url: WebSocket URL for the debugger.
         """
+        if not self.on_new_debugger:
+            return
         try:
-            # Get console messages by injecting a collector script
-            await self._setup_console_collector(ws_url)
-
-            # Get collected console messages
-            console_messages = await execute_js(
-                ws_url,
-                """
-                (function() {
-                    const messages = window.__ridiInjector_consoleMessages || [];
-                    window.__ridiInjector_consoleMessages = [];
-                    return messages;
-                })()
-                """,
+            async with self._attach_limit:
+                await self.on_new_debugger(debugger_id, ws_url)
+        except Exception as e:
+            # Keep one failing debugger from going unnoticed in its background task
+            logger.error(
+                "[debugger-%s] Failed to attach: %s", debugger_id, e, exc_info=True
             )
 
-            if (
-                console_messages
-                and isinstance(console_messages, list)
-                and len(console_messages) > 0
-            ):
-                for msg in console_messages:
-                    logger.debug("[debugger-%s] %s", debugger_id, msg)
-
-            # Check for errors
-            errors = await execute_js(
-                ws_url,
-                """
-                (function() {
-                    const errors = window.__ridiInjector_consoleErrors || [];
-                    window.__ridiInjector_consoleErrors = [];
-                    return errors;
-                })()
-                """,
-            )
+    async def _remove_debugger(self, debugger_id: str):
+        """Stop monitoring a destroyed debugger target.
 
-            if errors and isinstance(errors, list) and len(errors) > 0:
-                for error in errors:
-                    logger.error("[debugger-%s] %s", debugger_id, error)
-
-            # Check for warnings
-            warnings = await execute_js(
-                ws_url,
-                """
-                (function() {
-                    const warnings = window.__ridiInjector_consoleWarnings || [];
-                    window.__ridiInjector_consoleWarnings = [];
-                    return warnings;
-                })()
-                """,
-            )
-
-            if warnings and isinstance(warnings, list) and len(warnings) > 0:
-                for warning in warnings:
-                    logger.warning("[debugger-%s] %s", debugger_id, warning)
+        Args:
+            debugger_id: ID of the destroyed target.
+        """
+        self.attach_matched.pop(debugger_id, None)
+        if ws_url := self.active_debuggers.pop(debugger_id, None):
+            await close_session(ws_url)
+            logger.info("[debugger-%s] Debugger closed", debugger_id)
 
-        except (WebSocketException, json.JSONDecodeError, ConnectionError) as e:
-            logger.error("[debugger-%s] Failed to poll debugger: %s", debugger_id, e)
+    async def _watch_console(self, debugger_id: str, ws_url: str):
+        """Log a debugger's console output as CDP pushes it.
 
-    async def _setup_console_collector(self, ws_url: str):
-        """Set up console output collector in the browser.
+        Enabling the Runtime domain also reports console messages logged
+        before the debugger was attached.
 
         Args:
+            debugger_id: ID of the debugger.
             ws_url: WebSocket URL for the debugger.
         """
-        script = """
-        (function() {
-            if (window.__ridiInjector_consoleCollectorSetup) return "already-setup";
-            
-            window.__enableConsoleOutput = false;
-            window.__ridiInjector_consoleMessages = [];
-            window.__ridiInjector_consoleErrors = [];
-            window.__ridiInjector_consoleWarnings = [];
-            
-            const originalConsoleLog = console.log;
-            const originalConsoleError = console.error;
-            const originalConsoleWarn = console.warn;
-            
-            console.log = function() {
-                window.__ridiInjector_consoleMessages.push(
-                    Array.from(arguments).map(arg => String(arg)).join(" ")
-                );
-                if (window.__enableConsoleOutput) {
-                    return originalConsoleLog.apply(this, arguments);
-                }
-            };
-            
-            console.error = function() {
-                window.__ridiInjector_consoleErrors.push(
-                    Array.from(arguments).map(arg => String(arg)).join(" ")
-                );
-                if (window.__enableConsoleOutput) {
-                    return originalConsoleError.apply(this, arguments);
-                }
-            };
-            
-            console.warn = function() {
-                window.__ridiInjector_consoleWarnings.push(
-                    "WARN: " + Array.from(arguments).map(arg => String(arg)).join(" ")
-                );
-                if (window.__enableConsoleOutput) {
-                    return originalConsoleWarn.apply(this, arguments);
-                }
-            };
-            
-            window.addEventListener("error", function(event) {
-                window.__ridiInjector_consoleErrors.push(
-                    "UNCAUGHT: " + event.message + " at " + event.filename + ":" + event.lineno
-                );
-            });
-            
-            window.__ridiInjector_consoleCollectorSetup = true;
-            return "setup-complete";
-        })();
+        try:
+            session = await get_session(ws_url)
+            session.add_listener(
+                "Runtime.consoleAPICalled",
+                lambda params: self._log_console_call(debugger_id, params),
+            )
+            session.add_listener(
+                "Runtime.exceptionThrown",
+                lambda params: self._log_exception(debugger_id, params),
+            )
+            await session.send("Runtime.enable")
+        except (WebSocketException, ConnectionError) as e:
+            logger.error("[debugger-%s] Failed to watch console: %s", debugger_id, e)
+            return
+        logger.info("[debugger-%s] Started monitoring debugger", debugger_id)
+
+    @staticmethod
+    def _log_console_call(debugger_id: str, params: dict[str, Any]):
+        """Log a Runtime.consoleAPICalled event.
+
+        Args:
+            debugger_id: ID of the debugger.
+            params: Params of the event.
+        """
+        message = " ".join(format_remote_object(arg) for arg in params.get("args", []))
+        match params.get("type"):
+            case "error" | "assert":
+                logger.error("[debugger-%s] %s", debugger_id, message)
+            case "warning":
+                logger.warning("[debugger-%s] WARN: %s", debugger_id, message)
+            case _:
+                logger.debug("[debugger-%s] %s", debugger_id, message)
+
+    @staticmethod
+    def _log_exception(debugger_id: str, params: dict[str, Any]):
+        """Log a Runtime.exceptionThrown event.
+
+        Args:
+            debugger_id: ID of the debugger.
+            params: Params of the event.
         """
+        details = params.get("exceptionDetails", {})
+        exception = details.get("exception")
+        logger.error(
+            "[debugger-%s] UNCAUGHT: %s at %s:%s",
+            debugger_id,
+            format_remote_object(exception) if exception else details.get("text"),
+            details.get("url", ""),
+            details.get("lineNumber"),
+        )
+
 
-        result = await execute_js(ws_url, script)
-        if result == "setup-complete":
-            logger.debug("[debugger] Set up console collector for WebSocket %s", ws_url)
+@functools.cache
+def get_viewer_compile_command() -> bytes:
+    """Get the command compiling the viewer payload.
+
+    The payload is large, so the command is serialized only once.
+
+    Returns:
+        bytes: The command, serialized by prepare_command.
+    """
+    return prepare_command(
+        "Runtime.compileScript",
+        {
+            "expression": get_viewer_payload(),
+            "sourceURL": "ridi-injector.js",
+            "persistScript": True,
+        },
+    )
 
 
-async def inject_to_viewer(ws_url: str) -> Any:
+async def inject_to_viewer(ws_url: str) -> bool:
     """Inject JavaScript code into the RidiBooks viewer.
 
+    The payload is uploaded and compiled while the viewer settles, and only
+    run once the wait is over.
+
     Args:
         ws_url: WebSocket URL for the debugger.
 
     Returns:
-        Any: Result of the injection or False if failed.
+        bool: True if injected, False if not a viewer or failed.
     """
     # Check if we're in the viewer page
     if not await execute_js(ws_url, "location.href.endsWith('Viewer');"):
         return False
 
-    # Wait for iframe to be loaded
-    if not await wait_for(
-        lambda: execute_js(ws_url, "!!document.querySelector('iframe');")
-    ):
-        logger.warning("[inject] Timeout waiting for iframe")
+    # Upload and compile JSZip and the main injection script meanwhile
+    try:
+        session = await get_session(ws_url)
+        # Compiling needs the Runtime domain, enabling it again is harmless
+        await session.send("Runtime.enable")
+    except (WebSocketException, ConnectionError) as e:
+        logger.error("[inject] Failed to connect to viewer: %s", e)
         return False
+    compiled = asyncio.create_task(session.send_prepared(get_viewer_compile_command()))
 
     # Wait for animation frames - this exact timing is important
     await execute_js(
@@ -597,73 +1177,74 @@ async def inject_to_viewer(ws_url: str) -> Any:
         "(async()=>{for(let i=0;i<60;i++)await new Promise(requestAnimationFrame);})();",
     )
 
-    # Inject JSZip library
-    if not JSZIP_JS:
+    # Run the compiled payload
+    try:
+        response = await compiled
+        script_id = response.get("result", {}).get("scriptId")
+        if not script_id:
+            logger.error("[inject] Failed to compile injection scripts: %s", response)
+            return False
+        response = await session.send(
+            "Runtime.runScript", {"scriptId": script_id, "awaitPromise": True}
+        )
+    except (WebSocketException, ConnectionError) as e:
+        logger.error("[inject] Failed to inject: %s", e)
         return False
-    await execute_js(ws_url, JSZIP_JS)
-
-    # Inject main injection script
-    if not INJECT_JS:
+    if error := response.get("error"):
+        logger.error("[inject] Failed to run injection scripts: %s", error)
+        return False
+    if details := response.get("result", {}).get("exceptionDetails"):
+        exception = details.get("exception")
+        logger.error(
+            "[inject] Injection scripts threw: %s",
+            format_remote_object(exception) if exception else details.get("text"),
+        )
         return False
-    await execute_js(ws_url, INJECT_JS)
+    return True
 
 
-async def monitor_debuggers(debug_url: str) -> None:
-    """Monitor and inject into new debugger connections.
+async def attach_debugger(debugger_id: str, ws_url: str) -> None:
+    """Inject into a debugger that has navigated to the viewer.
 
     Args:
-        debug_url: URL for Chrome DevTools debugging.
-
-    This function runs in a loop, checking for new debugger connections
-    and injecting JavaScript code when appropriate.
+        debugger_id: ID of the debugger.
+        ws_url: WebSocket URL for the debugger.
     """
-    known_ids = set()
+    logger.info("[debugger-%s] New debugger found", debugger_id)
 
-    # Start debugger monitor for console output
-    monitor = DebuggerMonitor(debug_url)
-    await monitor.start_monitoring()
-
-    try:
-        while is_process_running(RIDI):
-            debuggers = get_debuggers(debug_url)
-            if not debuggers:
-                await asyncio.sleep(INTERVAL)
-                continue
+    # Check if we can connect to the debugger, after a frame to ensure page is ready
+    if not await execute_js(
+        ws_url, "(async()=>{await new Promise(requestAnimationFrame);return 1;})();"
+    ):
+        logger.warning("[debugger-%s] Could not connect to debugger", debugger_id)
+        return
 
-            current_ids = {d["id"] for d in debuggers}
-            new_debuggers = [d for d in debuggers if d["id"] not in known_ids]
+    # Try to inject to viewer
+    result = await inject_to_viewer(ws_url)
+    if result:
+        logger.info("[debugger-%s] Successfully injected", debugger_id)
+    else:
+        logger.debug("[debugger-%s] Not a viewer or injection failed", debugger_id)
 
-            for debugger in new_debuggers:
-                ws_url = debugger["webSocketDebuggerUrl"]
-                logger.info("[debugger-%s] New debugger found", debugger["id"])
 
-                # Check if we can connect to the debugger
-                if await execute_js(ws_url, "1"):
-                    # Wait for a frame to ensure page is ready
-                    await execute_js(
-                        ws_url,
-                        "(async()=>{await new Promise(requestAnimationFrame);})();",
-                    )
+async def monitor_debuggers(debug_url: str, exited: asyncio.Future) -> None:
+    """Monitor and inject into new debugger connections.
 
-                    # Try to inject to viewer
-                    result = await inject_to_viewer(ws_url)
-                    if result:
-                        logger.info(
-                            "[debugger-%s] Successfully injected", debugger["id"]
-                        )
-                    else:
-                        logger.debug(
-                            "[debugger-%s] Not a viewer or injection failed",
-                            debugger["id"],
-                        )
-                else:
-                    logger.warning(
-                        "[debugger-%s] Could not connect to debugger", debugger["id"]
-                    )
+    Args:
+        debug_url: URL for Chrome DevTools debugging.
+        exited: Future resolved when the RidiBooks process exits.
 
-            known_ids = current_ids
-            await asyncio.sleep(INTERVAL)
+    New debuggers are reported by the DebuggerMonitor as they are created,
+    and JavaScript code is injected into them when appropriate.
+    """
+    # Targets start out blank, so wait until one has navigated to the viewer
+    monitor = DebuggerMonitor(
+        debug_url, exited, attach_debugger, lambda url: url.endswith("Viewer")
+    )
+    await monitor.start_monitoring()
 
+    try:
+        await exited
         logger.info("[debugger] RidiBooks process exited, stopping monitor")
     finally:
         await monitor.stop_monitoring()
@@ -672,70 +1253,94 @@ async def monitor_debuggers(debug_url: str) -> None:
 class RidiProcess:
     """Context manager for handling RidiBooks process lifecycle."""
 
-    def __init__(self, path: str, debug_port: int):
+    def __init__(self, path: str, debug_port: int, capture_output: bool = False):
         """Initialize RidiBooks process handler.
 
         Args:
             path: Path to the RidiBooks executable.
             debug_port: Port to use for Chrome DevTools debugging.
+            capture_output: Whether to log the process' stdout and stderr.
         """
-        self.command = (
-            f'"{path}"' if IS_WINDOWS else f"open -a {RIDI} --args"
-        ) + f" --remote-debugging-port={debug_port}"
+        self.capture_output = capture_output
+        self.argv = [path, f"--remote-debugging-port={debug_port}"]
         self.process = None
+        self.exited: asyncio.Future | None = None
+        self._exit_task = None
+        self.job: JobObject | None = None
 
-    async def __aenter__(self) -> subprocess.Popen:
+    async def __aenter__(self) -> "RidiProcess":
         """Start the RidiBooks process.
 
         Returns:
-            subprocess.Popen: The process object.
+            RidiProcess: This handler, with `process` and `exited` set.
         """
-        logger.info("[RidiBooks] Starting RidiBooks with command: %s", self.command)
-        self.process = subprocess.Popen(
-            self.command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+        logger.info(
+            "[RidiBooks] Starting RidiBooks with command: %s", " ".join(self.argv)
+        )
+        output = subprocess.PIPE if self.capture_output else subprocess.DEVNULL
+        self.process = await asyncio.create_subprocess_exec(
+            *self.argv, stdout=output, stderr=output
         )
 
+        # Tie RidiBooks and every process it starts to a job closed on exit
+        if IS_WINDOWS:
+            try:
+                self.job = JobObject()
+                self.job.assign(self.process.pid)
+            except OSError as e:
+                logger.warning("[RidiBooks] Failed to set up job object: %s", e)
+
         await asyncio.sleep(0.5)
 
-        if IS_WINDOWS:
-            pid = self.process.pid
-        else:
-            pids = [
-                proc.info["pid"]
-                for proc in psutil.process_iter(["pid", "name"])
-                if proc.info.get("name") == RIDI
-            ]
-            if len(pids) != 1:
-                logger.error("[RidiBooks] Failed to find Ridibooks process")
-                raise RuntimeError("Failed to find Ridibooks process")
-            pid = pids[0]
-
-        if not REMOTE_DEBUGGING_JS:
-            logger.error("[RidiBooks] Failed to read remote debugging script")
-            raise RuntimeError("Failed to read remote debugging script")
+        # Cache a handle of the launched process for later liveness checks
+        pid = self.process.pid
+        cache_process(RIDI, pid)
+
         logger.debug("[RidiBooks] Injecting into RidiBooks process pid: %s", pid)
         try:
-            frida.attach(pid).create_script(REMOTE_DEBUGGING_JS).load()
+            # Attaching blocks for a while, keep the event loop responsive meanwhile
+            await asyncio.to_thread(
+                lambda: frida.attach(pid)
+                .create_script(get_remote_debugging_js())
+                .load()
+            )
         except frida.ProcessNotFoundError as e:
             logger.error("RidiBooks process not found for injection")
             raise RuntimeError("RidiBooks process not found for injection") from e
         logger.debug("[RidiBooks] Injected into RidiBooks process pid: %s", pid)
 
+        self.exited = asyncio.get_running_loop().create_future()
+        self._exit_task = asyncio.create_task(self._wait_for_exit())
+
         # Start tasks to capture process output
-        asyncio.create_task(
-            self._log_process_output(self.process.stdout, logging.DEBUG)
-        )
-        asyncio.create_task(
-            self._log_process_output(self.process.stderr, logging.ERROR)
-        )
+        if self.capture_output:
+            asyncio.create_task(
+                self._log_process_output(self.process.stdout, logging.DEBUG)
+            )
+            asyncio.create_task(
+                self._log_process_output(self.process.stderr, logging.ERROR)
+            )
 
-        return self.process
+        return self
 
-    async def _log_process_output(self, pipe, log_level):
+    async def _wait_for_exit(self) -> None:
+        """Resolve the exit future once every RidiBooks process has exited.
+
+        The launched process is our child, so it is awaited through asyncio,
+        which reaps it. Helper processes of the same name are not, and are
+        waited for on their handles in a worker thread instead.
+        """
+        try:
+            await self.process.wait()
+            while procs := [
+                proc for proc in find_processes(RIDI) if proc.pid != self.process.pid
+            ]:
+                await asyncio.to_thread(psutil.wait_procs, procs)
+        finally:
+            if not self.exited.done():
+                self.exited.set_result(None)
+
+    async def _log_process_output(self, pipe: asyncio.StreamReader, log_level):
         """Log process output.
 
         Args:
@@ -743,10 +1348,16 @@ class RidiProcess:
             log_level: Logging level to use.
         """
         while True:
-            line = await asyncio.to_thread(pipe.readline)
+            try:
+                line = await pipe.readline()
+            except ValueError:
+                # Line longer than the stream limit, skip it but keep draining
+                continue
             if not line:
                 break
-            logger.log(log_level, "[RidiBooks] %s", line.strip())
+            logger.log(
+                log_level, "[RidiBooks] %s", line.decode(errors="replace").strip()
+            )
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
         """Terminate the RidiBooks process when exiting context.
@@ -756,37 +1367,54 @@ class RidiProcess:
             exc_val: Exception value if an exception was raised.
             exc_tb: Exception traceback if an exception was raised.
         """
-        if self.process:
+        if self._exit_task:
+            self._exit_task.cancel()
+
+        if self.process and self.process.returncode is None:
             try:
                 logger.info("[RidiBooks] Terminating RidiBooks process")
                 self.process.terminate()
-                self.process.wait(timeout=0.5)
+                await asyncio.wait_for(self.process.wait(), timeout=0.5)
                 logger.info("[RidiBooks] RidiBooks process terminated")
-            except subprocess.TimeoutExpired:
+            except TimeoutError:
                 logger.warning(
                     "[RidiBooks] Failed to terminate RidiBooks process, try kill"
                 )
                 try:
                     self.process.kill()
-                    self.process.wait()
+                    await self.process.wait()
                     logger.info("[RidiBooks] RidiBooks process killed")
-                except subprocess.SubprocessError as e:
+                except ProcessLookupError as e:
                     logger.error("[RidiBooks] Failed to kill RidiBooks process: %s", e)
+            except ProcessLookupError:
+                logger.info("[RidiBooks] RidiBooks process already exited")
+
+        if self.job:
+            logger.info("[RidiBooks] Closing job object of RidiBooks processes")
+            self.job.close()
 
         # Ensure all Ridibooks processes are terminated using platform-specific function
         if is_process_running(RIDI):
             logger.info("[RidiBooks] Killing all remaining RidiBooks processes")
-            terminate_process(RIDI)
+            await asyncio.to_thread(terminate_process, RIDI)
 
 
-async def main() -> None:
-    """Main function - start or connect to RidiBooks and inject custom code."""
+async def main(log_ridi_output: bool = False) -> None:
+    """Main function - start or connect to RidiBooks and inject custom code.
+
+    Args:
+        log_ridi_output: Whether to log RidiBooks' own stdout and stderr.
+    """
     # Initialize debug port and URL
     debug_port = get_free_port()
     logger.info("Debug port: %d", debug_port)
     debug_url = f"http://127.0.0.1:{debug_port}/json"
 
     try:
+        # Read the scripts now, so fail before launching if any is missing
+        if not (get_viewer_payload() and get_remote_debugging_js()):
+            raise FileNotFoundError("Cannot read injection scripts")
+
         # Always kill any existing RidiBooks process first
         if is_process_running(RIDI):
             logger.info("RidiBooks is already running, terminating it")
@@ -804,12 +1432,12 @@ async def main() -> None:
 
         logger.info("Found RidiBooks at: %s", ridi_path)
 
-        async with RidiProcess(ridi_path, debug_port):
+        async with RidiProcess(ridi_path, debug_port, log_ridi_output) as ridi:
             if not await wait_for(lambda: is_process_running(RIDI)):
                 raise TimeoutError("Start RidiBooks.exe timeout")
 
             logger.info("RidiBooks started successfully")
-            await monitor_debuggers(debug_url)
+            await monitor_debuggers(debug_url, ridi.exited)
 
     except FileNotFoundError as e:
         logger.error("File not found: %s", e, exc_info=True)
@@ -824,6 +1452,22 @@ async def main() -> None:
         sys.exit(1)
 
 
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create the event loop to run the injector on.
+
+    Windows uses the IOCP-based proactor loop, which asyncio subprocess pipes
+    require. Elsewhere uvloop is used if it is installed.
+
+    Returns:
+        asyncio.AbstractEventLoop: The new event loop.
+    """
+    if IS_WINDOWS:
+        return asyncio.ProactorEventLoop()
+    if uvloop:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
 if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="RidiBooks Injector")
@@ -842,6 +1486,11 @@ if __name__ == "__main__":
         "--no-log",
         help="Disable logging to file",
     )
+    parser.add_argument(
+        "--log-ridi-output",
+        action="store_true",
+        help="Log RidiBooks' own stdout and stderr",
+    )
     args = parser.parse_args()
 
     # Configure logger
@@ -859,7 +1508,8 @@ if __name__ == "__main__":
             raise
 
     try:
-        asyncio.run(main())
+        with asyncio.Runner(loop_factory=new_event_loop) as runner:
+            runner.run(main(args.log_ridi_output))
     except KeyboardInterrupt:
         logger.info("Script interrupted by user")
     except Exception as e: